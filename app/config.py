@@ -8,6 +8,13 @@ EXCEL_PATH: Path = Path("data/medicines.xlsx")
 # Sheet name inside the Excel workbook.
 EXCEL_SHEET_NAME: str = "Medicines"
 
+# Inventory backend used by the UI: "excel" reads and writes the workbook above,
+# "sqlite" imports it once into SQLITE_PATH and keeps stock there afterwards.
+STORE_BACKEND: str = "excel"
+
+# Path to the SQLite database used when STORE_BACKEND is "sqlite".
+SQLITE_PATH: Path = Path("data/medicines.sqlite3")
+
 # Name of the Windows printer to target for receipts.
 PRINTER_NAME: str = "Star TSP700II (TSP743II)"
 
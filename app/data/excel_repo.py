@@ -4,9 +4,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from openpyxl import load_workbook
+from openpyxl.workbook.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
 from app import config
@@ -31,10 +32,24 @@ class ExcelRepository:
     def __init__(self, path: Path | str = None, sheet_name: Optional[str] = None) -> None:
         self.path: Path = Path(path) if path else config.EXCEL_PATH
         self.sheet_name = sheet_name or config.EXCEL_SHEET_NAME
-        self._workbook = load_workbook(self.path)
-        self._sheet: Worksheet = self._workbook[self.sheet_name]
+        self._workbook: Optional[Workbook] = None
+        # Read-only worksheet of the streaming handle; openpyxl does not export its type.
+        self._sheet: Optional[Any] = None
+        self._row_by_name: Dict[str, int] = {}
+        self._open_reader()
         self._columns = self._detect_columns()
 
+    def _open_reader(self) -> None:
+        """Open a streaming read-only handle; writes use a separate workbook."""
+        self._workbook = load_workbook(self.path, read_only=True, data_only=True, keep_links=False)
+        self._sheet = self._workbook[self.sheet_name]
+
+    def _close_reader(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+        self._workbook = None
+        self._sheet = None
+
     def _detect_columns(self) -> ExcelColumnMap:
         """Detect columns from header row; raises if missing."""
         headers: Dict[str, int] = {}
@@ -57,42 +72,101 @@ class ExcelRepository:
 
     def list_medicines(self) -> List[Medicine]:
         """Return all medicines as dataclasses."""
+        if self._sheet is None:
+            self._open_reader()
+        columns = self._columns
+        name_i = columns.name - 1
+        mg_i = columns.mg - 1
+        rack_i = columns.rack_number - 1
+        stock_i = columns.stock - 1
+        price_i = columns.price - 1
+        actual_i = columns.actual_price - 1
+        # openpyxl builds values only up to max_col; its read-only rows come back
+        # padded with None to that width.
+        max_col = max(name_i, mg_i, rack_i, stock_i, price_i, actual_i) + 1
+
         medicines: List[Medicine] = []
-        for row in self._sheet.iter_rows(min_row=2, values_only=False):
-            name = row[self._columns.name - 1].value
-            if not name:
-                continue
-
-            mg = row[self._columns.mg - 1].value or ""
-            rack_number = row[self._columns.rack_number - 1].value or ""
-            stock = self._to_int(row[self._columns.stock - 1].value, default=0)
-            price = self._to_float(row[self._columns.price - 1].value, default=0.0)
-            actual_price = self._to_float(row[self._columns.actual_price - 1].value, default=None)
-
-            medicines.append(
-                Medicine(
-                    name=str(name),
-                    mg=str(mg),
-                    rack_number=str(rack_number),
-                    stock=stock,
-                    price=price,
-                    actual_price=actual_price,
+        row_by_name: Dict[str, int] = {}
+        try:
+            rows = self._sheet.iter_rows(min_row=2, max_col=max_col, values_only=True)
+            for row_idx, row in enumerate(rows, start=2):
+                name = row[name_i]
+                if not name:
+                    continue
+                row_by_name[str(name)] = row_idx
+
+                mg = row[mg_i] or ""
+                rack_number = row[rack_i] or ""
+                stock = self._to_int(row[stock_i], default=0)
+                price = self._to_float(row[price_i], default=0.0)
+                actual_price = self._to_float(row[actual_i], default=None)
+
+                medicines.append(
+                    Medicine(
+                        name=str(name),
+                        mg=str(mg),
+                        rack_number=str(rack_number),
+                        stock=stock,
+                        price=price,
+                        actual_price=actual_price,
+                    )
                 )
-            )
+        finally:
+            # Read-only workbooks hold the file open until closed; release it so
+            # Excel can save over it. The next read reopens it.
+            self._close_reader()
+        self._row_by_name = row_by_name
         return medicines
 
     def save_stock_updates(self, updated_stocks: Dict[str, int]) -> None:
-        """Persist stock updates back to Excel."""
-        for row in self._sheet.iter_rows(min_row=2):
-            name_cell = row[self._columns.name - 1]
-            stock_cell = row[self._columns.stock - 1]
-            if name_cell.value in updated_stocks:
-                stock_cell.value = updated_stocks[name_cell.value]
-        self._workbook.save(self.path)
+        """Persist stock updates back to Excel.
+
+        Rows are addressed through the index built by ``list_medicines``, so
+        only the updated Stock cells are touched. The workbook may have been
+        edited since then, so each row's name is checked first and the sheet is
+        rescanned by name when a row no longer holds the expected medicine.
+        """
+        if not self._row_by_name:
+            self.list_medicines()
+        # The read-only handle keeps the file open; release it before rewriting.
+        self._close_reader()
+        workbook = load_workbook(self.path)
+        try:
+            sheet = workbook[self.sheet_name]
+            name_col = self._columns.name
+            stock_col = self._columns.stock
+            row_by_name = self._row_by_name
+            for name in updated_stocks:
+                row_idx = row_by_name.get(name)
+                if row_idx is not None and sheet.cell(row=row_idx, column=name_col).value != name:
+                    row_by_name = self._row_by_name = self._scan_rows_by_name(sheet)
+                    break
+            for name, new_stock in updated_stocks.items():
+                row_idx = row_by_name.get(name)
+                if row_idx is not None:
+                    sheet.cell(row=row_idx, column=stock_col).value = new_stock
+            workbook.save(self.path)
+        finally:
+            workbook.close()
+
+    def _scan_rows_by_name(self, sheet: Worksheet) -> Dict[str, int]:
+        """Map medicine names to their current rows in ``sheet``."""
+        name_col = self._columns.name
+        row_by_name: Dict[str, int] = {}
+        rows = sheet.iter_rows(min_row=2, min_col=name_col, max_col=name_col, values_only=True)
+        for row_idx, (name,) in enumerate(rows, start=2):
+            if name:
+                row_by_name[str(name)] = row_idx
+        return row_by_name
 
     @staticmethod
     def _to_float(value, default: Optional[float]) -> Optional[float]:
-        if value in (None, ""):
+        value_type = type(value)
+        if value_type is float:
+            return value
+        if value_type is int:
+            return float(value)
+        if value is None or value == "":
             return default
         try:
             return float(value)
@@ -101,7 +175,9 @@ class ExcelRepository:
 
     @staticmethod
     def _to_int(value, default: int) -> int:
-        if value in (None, ""):
+        if type(value) is int:
+            return value
+        if value is None or value == "":
             return default
         try:
             return int(value)
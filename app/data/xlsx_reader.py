@@ -0,0 +1,173 @@
+"""Streaming reader for cell values in .xlsx worksheets.
+
+Parses the worksheet XML directly with ``zipfile`` + ``iterparse`` so rows are
+produced as plain value lists without building openpyxl cell objects. Only
+cached values are read (formulas are not evaluated), matching
+``load_workbook(data_only=True)``. Writing still goes through openpyxl.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_SHEET = f"{_MAIN_NS}sheet"
+_SI = f"{_MAIN_NS}si"
+_T = f"{_MAIN_NS}t"
+_RPH = f"{_MAIN_NS}rPh"
+_ROW = f"{_MAIN_NS}row"
+_V = f"{_MAIN_NS}v"
+_IS = f"{_MAIN_NS}is"
+_RELATIONSHIP = f"{_PKG_REL_NS}Relationship"
+
+
+def _cast_number(value: str):
+    """Convert a numeric cell string to int or float, as openpyxl does."""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _column_index(ref: str) -> int:
+    """Return the 1-based column index for a cell reference such as ``AB12``."""
+    col = 0
+    for ch in ref:
+        if "A" <= ch <= "Z":
+            col = col * 26 + (ord(ch) - 64)
+        else:
+            break
+    return col
+
+
+def _text_of(element) -> str:
+    """Join the ``<t>`` runs of a string item, skipping phonetic hints."""
+    parts: List[str] = []
+    for child in element:
+        if child.tag == _T:
+            parts.append(child.text or "")
+        elif child.tag != _RPH:
+            parts.extend(t.text or "" for t in child.iter(_T))
+    return "".join(parts)
+
+
+class FastExcelReader:
+    """Read worksheet values from an .xlsx file without openpyxl."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        with zipfile.ZipFile(self.path) as archive:
+            self._sheet_paths = self._read_sheet_paths(archive)
+            self._shared_strings = self._read_shared_strings(archive)
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self._sheet_paths)
+
+    @staticmethod
+    def _read_sheet_paths(archive: zipfile.ZipFile) -> Dict[str, str]:
+        """Map sheet names to their XML part inside the archive."""
+        targets: Dict[str, str] = {}
+        with archive.open("xl/_rels/workbook.xml.rels") as fh:
+            for _, el in iterparse(fh):
+                if el.tag == _RELATIONSHIP:
+                    target = el.get("Target", "")
+                    if target.startswith("/"):
+                        target = target.lstrip("/")
+                    else:
+                        target = posixpath.normpath(posixpath.join("xl", target))
+                    targets[el.get("Id")] = target
+
+        paths: Dict[str, str] = {}
+        with archive.open("xl/workbook.xml") as fh:
+            for _, el in iterparse(fh):
+                if el.tag == _SHEET:
+                    target = targets.get(el.get(f"{_REL_NS}id"))
+                    if target:
+                        paths[el.get("name")] = target
+        return paths
+
+    @staticmethod
+    def _read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+        """Load the shared-strings table once; cells refer to it by index."""
+        try:
+            fh = archive.open("xl/sharedStrings.xml")
+        except KeyError:
+            return []
+        strings: List[str] = []
+        with fh:
+            for _, el in iterparse(fh):
+                if el.tag == _SI:
+                    strings.append(_text_of(el))
+                    el.clear()
+        return strings
+
+    def iter_rows(
+        self,
+        sheet_name: str,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        max_col: Optional[int] = None,
+    ) -> Iterator[Tuple[int, List]]:
+        """Yield ``(row_index, values)`` for each stored row of ``sheet_name``.
+
+        ``values`` is indexed by zero-based column. When ``max_col`` is given the
+        list is padded with None to exactly that width; otherwise it ends at the
+        last stored cell. Rows that are absent from the XML are not yielded.
+        """
+        if sheet_name not in self._sheet_paths:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+        sst = self._shared_strings
+        with zipfile.ZipFile(self.path) as archive, archive.open(self._sheet_paths[sheet_name]) as fh:
+            row_idx = 0
+            for _, row_el in iterparse(fh):
+                if row_el.tag != _ROW:
+                    continue
+                r = row_el.get("r")
+                row_idx = int(r) if r else row_idx + 1
+                if row_idx < min_row:
+                    row_el.clear()
+                    continue
+                if max_row is not None and row_idx > max_row:
+                    break
+
+                values: List = [None] * max_col if max_col else []
+                col = 0
+                for cell in row_el:
+                    ref = cell.get("r")
+                    col = _column_index(ref) if ref else col + 1
+                    if max_col and col > max_col:
+                        continue
+
+                    cell_type = cell.get("t", "n")
+                    if cell_type == "inlineStr":
+                        inline = cell.find(_IS)
+                        value = _text_of(inline) if inline is not None else None
+                    else:
+                        v = cell.find(_V)
+                        raw = v.text if v is not None else None
+                        if raw is None:
+                            value = None
+                        elif cell_type == "s":
+                            value = sst[int(raw)]
+                        elif cell_type == "n":
+                            value = _cast_number(raw)
+                        elif cell_type == "b":
+                            value = bool(int(raw))
+                        else:
+                            # "str" (formula text), "e" (error code) and "d" (ISO date)
+                            value = raw
+
+                    if not max_col and col > len(values):
+                        values.extend([None] * (col - len(values)))
+                    values[col - 1] = value
+
+                row_el.clear()
+                yield row_idx, values
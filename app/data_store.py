@@ -2,103 +2,187 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+import pickle
+from array import array
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 from openpyxl import load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
 from app import config
+from app.data.xlsx_reader import FastExcelReader
 
 
 REQUIRED_COLUMNS = ["Medicine_Name", "Price", "Stock", "MG", "Rack_Number", "Actual_Price"]
 
+# Bump when the pickled layout of the inventory cache changes.
+_CACHE_VERSION = 2
 
+
+@lru_cache(maxsize=8192)
 def _normalize_name(name: str) -> str:
     return str(name).strip().lower()
 
 
-@dataclass
-class _RowRef:
-    row_index: int
-    stock_cell_ref: str
-
-
 class ExcelDataStore:
     """Loads and mutates inventory from an Excel sheet."""
 
     def __init__(self, path: Path | str = None, sheet_name: str | None = None) -> None:
         self.path: Path = Path(path) if path else config.EXCEL_PATH
         self.sheet_name = sheet_name or config.EXCEL_SHEET_NAME
-        self._workbook = None
-        self._sheet: Optional[Worksheet] = None
+        self._cache_path: Path = self.path.with_suffix(".cache.pkl")
         self._col_map: Dict[str, int] = {}
+        # Inventory is held column-wise; position i across these describes one row.
         self._names: List[str] = []
-        self._records: Dict[str, Dict] = {}
-        self._row_refs: Dict[str, _RowRef] = {}
+        self._mg: List[str] = []
+        self._rack: List[str] = []
+        self._stock = array("q")
+        self._price = array("d")
+        self._row_index = array("q")
+        self._index: Dict[str, int] = {}
+        self._dirty: Set[int] = set()
+        # Key of the workbook state the in-memory rows were read from.
+        self._loaded_key: Optional[Tuple] = None
         self._load()
 
     def _load(self) -> None:
         if not self.path.exists():
             raise FileNotFoundError(f"Excel file not found: {self.path}")
 
-        self._workbook = load_workbook(self.path)
-        if self.sheet_name not in self._workbook.sheetnames:
+        key = self._cache_key()
+        if self._load_cache(key):
+            self._loaded_key = key
+            return
+
+        # Stream values straight from the sheet XML; save() opens the workbook
+        # with openpyxl only when there is something to write.
+        reader = FastExcelReader(self.path)
+        if self.sheet_name not in reader.sheetnames:
             raise ValueError(f"Sheet '{self.sheet_name}' not found in Excel file.")
 
-        self._sheet = self._workbook[self.sheet_name]
-        self._col_map = self._detect_columns()
-        self._read_rows()
+        self._col_map = self._detect_columns(reader)
+        self._read_rows(reader)
+        self._write_cache(key)
+        self._loaded_key = key
+
+    def _cache_key(self) -> Tuple:
+        stat = self.path.stat()
+        return (_CACHE_VERSION, self.sheet_name, stat.st_mtime_ns, stat.st_size)
+
+    def _load_cache(self, key: Tuple) -> bool:
+        """Restore parsed rows from the pickle cache when it matches the workbook."""
+        try:
+            with self._cache_path.open("rb") as fh:
+                cached_key, payload = pickle.load(fh)
+            if cached_key != key:
+                return False
+            # A payload of another layout fails to unpack; treat it as a miss.
+            (col_map, names, mg, rack, stock, price, row_index, index) = payload
+        except (OSError, pickle.PickleError, EOFError, AttributeError, TypeError, ValueError):
+            return False
+        self._col_map = col_map
+        self._names = names
+        self._mg = mg
+        self._rack = rack
+        self._stock = stock
+        self._price = price
+        self._row_index = row_index
+        self._index = index
+        self._dirty.clear()
+        return True
+
+    def _write_cache(self, key: Tuple) -> None:
+        """Write the cache atomically; failures only cost a re-parse next time."""
+        payload = (
+            self._col_map,
+            self._names,
+            self._mg,
+            self._rack,
+            self._stock,
+            self._price,
+            self._row_index,
+            self._index,
+        )
+        tmp_path = self._cache_path.with_name(self._cache_path.name + ".tmp")
+        try:
+            with tmp_path.open("wb") as fh:
+                pickle.dump((key, payload), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._cache_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
 
-    def _detect_columns(self) -> Dict[str, int]:
+    def _detect_columns(self, reader: FastExcelReader) -> Dict[str, int]:
         headers: Dict[str, int] = {}
-        for idx, cell in enumerate(self._sheet[1], start=1):
-            if cell.value is not None:
-                headers[str(cell.value).strip()] = idx
+        for _, values in reader.iter_rows(self.sheet_name, min_row=1, max_row=1):
+            for idx, value in enumerate(values, start=1):
+                if value is not None:
+                    headers[str(value).strip()] = idx
 
         missing = [col for col in REQUIRED_COLUMNS if col not in headers]
         if missing:
             raise ValueError(f"Missing required columns: {', '.join(missing)}")
         return headers
 
-    def _read_rows(self) -> None:
-        self._names.clear()
-        self._records.clear()
-        self._row_refs.clear()
-
-        for row_idx, row in enumerate(self._sheet.iter_rows(min_row=2), start=2):
-            name_val = row[self._col_map["Medicine_Name"] - 1].value
+    def _read_rows(self, reader: FastExcelReader) -> None:
+        names: List[str] = []
+        mgs: List[str] = []
+        racks: List[str] = []
+        stocks = array("q")
+        prices = array("d")
+        row_indexes = array("q")
+        index: Dict[str, int] = {}
+        # Resolve header positions once instead of per row.
+        name_i = self._col_map["Medicine_Name"] - 1
+        mg_i = self._col_map["MG"] - 1
+        rack_i = self._col_map["Rack_Number"] - 1
+        stock_i = self._col_map["Stock"] - 1
+        price_i = self._col_map["Price"] - 1
+        actual_i = self._col_map["Actual_Price"] - 1
+        # FastExcelReader stops each row at max_col and pads it to that width, and
+        # resolves string cells against one shared-strings list, so repeated MG/Rack
+        # values share one str.
+        max_col = max(name_i, mg_i, rack_i, stock_i, price_i, actual_i) + 1
+
+        for row_idx, row in reader.iter_rows(self.sheet_name, min_row=2, max_col=max_col):
+            name_val = row[name_i]
             if name_val in (None, ""):
                 continue
 
-            mg = row[self._col_map["MG"] - 1].value or ""
-            rack = row[self._col_map["Rack_Number"] - 1].value or ""
-            stock = self._to_int(row[self._col_map["Stock"] - 1].value, default=0)
-            price_val = self._to_float(row[self._col_map["Price"] - 1].value, default=0.0)
-            actual_price_val = self._to_float(
-                row[self._col_map["Actual_Price"] - 1].value, default=None
-            )
+            mg = row[mg_i] or ""
+            rack = row[rack_i] or ""
+            stock = self._to_int(row[stock_i], default=0)
+            price_val = self._to_float(row[price_i], default=0.0)
+            actual_price_val = self._to_float(row[actual_i], default=None)
             effective_price = (
                 actual_price_val if actual_price_val not in (None, "") else price_val
             )
 
-            norm_name = _normalize_name(name_val)
-            record = {
-                "name": str(name_val),
-                "mg": str(mg),
-                "rack": str(rack),
-                "stock": stock,
-                "price": effective_price,
-            }
-            self._names.append(record["name"])
-            self._records[norm_name] = record
-            stock_cell = row[self._col_map["Stock"] - 1].coordinate
-            self._row_refs[norm_name] = _RowRef(row_index=row_idx, stock_cell_ref=stock_cell)
+            index[_normalize_name(name_val)] = len(names)
+            names.append(str(name_val))
+            mgs.append(str(mg))
+            racks.append(str(rack))
+            stocks.append(stock)
+            prices.append(effective_price)
+            row_indexes.append(row_idx)
+
+        self._names = names
+        self._mg = mgs
+        self._rack = racks
+        self._stock = stocks
+        self._price = prices
+        self._row_index = row_indexes
+        self._index = index
+        self._dirty.clear()
 
     @staticmethod
     def _to_int(value, default: int) -> int:
-        if value in (None, ""):
+        # FastExcelReader returns numeric cells as int/float; only text needs parsing.
+        if type(value) is int:
+            return value
+        if value is None or value == "":
             return default
         try:
             return int(value)
@@ -107,7 +191,12 @@ class ExcelDataStore:
 
     @staticmethod
     def _to_float(value, default: Optional[float]) -> Optional[float]:
-        if value in (None, ""):
+        value_type = type(value)
+        if value_type is float:
+            return value
+        if value_type is int:
+            return float(value)
+        if value is None or value == "":
             return default
         try:
             return float(value)
@@ -120,31 +209,127 @@ class ExcelDataStore:
 
     def get_medicine(self, name: str) -> Optional[Dict]:
         """Return a record dict or None if not found."""
-        return self._records.get(_normalize_name(name))
+        i = self._index.get(_normalize_name(name))
+        if i is None:
+            return None
+        return {
+            "name": self._names[i],
+            "mg": self._mg[i],
+            "rack": self._rack[i],
+            "stock": self._stock[i],
+            "price": self._price[i],
+        }
 
     def reduce_stock(self, name: str, qty: int) -> None:
         """Reduce stock for a medicine. Raises if insufficient."""
         if qty <= 0:
             raise ValueError("Quantity must be positive.")
-        norm = _normalize_name(name)
-        if norm not in self._records:
+        i = self._index.get(_normalize_name(name))
+        if i is None:
             raise KeyError(f"Medicine '{name}' not found.")
 
-        record = self._records[norm]
-        new_stock = record["stock"] - qty
+        stock = self._stock[i]
+        new_stock = stock - qty
         if new_stock < 0:
             raise ValueError(
-                f"Insufficient stock for '{record['name']}'. "
-                f"Available: {record['stock']}, requested: {qty}."
+                f"Insufficient stock for '{self._names[i]}'. "
+                f"Available: {stock}, requested: {qty}."
             )
 
-        record["stock"] = new_stock
-        stock_cell_ref = self._row_refs[norm].stock_cell_ref
-        self._sheet[stock_cell_ref].value = new_stock
+        self._stock[i] = new_stock
+        self._dirty.add(i)
+
+    def batch_reduce_stock(self, deltas: Dict[str, int]) -> None:
+        """Reduce stock for several medicines at once.
+
+        Every entry is validated before any stock changes, so a failure leaves
+        the store untouched.
+        """
+        by_pos: Dict[int, int] = {}
+        for name, qty in deltas.items():
+            if qty <= 0:
+                raise ValueError("Quantity must be positive.")
+            i = self._index.get(_normalize_name(name))
+            if i is None:
+                raise KeyError(f"Medicine '{name}' not found.")
+            by_pos[i] = by_pos.get(i, 0) + qty
+
+        stocks = self._stock
+        for i, qty in by_pos.items():
+            if stocks[i] < qty:
+                raise ValueError(
+                    f"Insufficient stock for '{self._names[i]}'. "
+                    f"Available: {stocks[i]}, requested: {qty}."
+                )
+
+        for i, qty in by_pos.items():
+            stocks[i] -= qty
+        self._dirty.update(by_pos)
 
     def save(self) -> None:
         """Persist changes to disk."""
-        self._workbook.save(self.path)
+        if not self._dirty:
+            return
+        # If the workbook changed on disk since it was read, the rows in memory no
+        # longer describe the file being written, so they must not be cached for it.
+        in_sync = self._cache_key() == self._loaded_key
+        # openpyxl never evaluates formulas, so there is no calculation cost to
+        # switch off here; conditional formatting is kept as the user set it up.
+        workbook = load_workbook(self.path)
+        try:
+            sheet = workbook[self.sheet_name]
+            if in_sync:
+                stock_col = self._col_map["Stock"]
+            else:
+                stock_col = self._relocate_dirty_rows(sheet)
+            for i in self._dirty:
+                sheet.cell(row=self._row_index[i], column=stock_col).value = self._stock[i]
+            workbook.save(self.path)
+        finally:
+            workbook.close()
+        self._dirty.clear()
+        if in_sync:
+            self._loaded_key = self._cache_key()
+            self._write_cache(self._loaded_key)
+        else:
+            self._cache_path.unlink(missing_ok=True)
+
+    def _relocate_dirty_rows(self, sheet: Worksheet) -> int:
+        """Find the dirty medicines again by name in a sheet edited since load.
+
+        Updates ``_row_index`` for them and returns the Stock column. Raises
+        before anything is written when a column or medicine can no longer be
+        found, so stock never lands on another product's row.
+        """
+        headers: Dict[str, int] = {}
+        for values in sheet.iter_rows(min_row=1, max_row=1, values_only=True):
+            for idx, value in enumerate(values, start=1):
+                if value is not None:
+                    headers[str(value).strip()] = idx
+        missing = [col for col in ("Medicine_Name", "Stock") if col not in headers]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+        name_col = headers["Medicine_Name"]
+        rows: Dict[str, int] = {}
+        for row_idx, (name_val,) in enumerate(
+            sheet.iter_rows(min_row=2, min_col=name_col, max_col=name_col, values_only=True),
+            start=2,
+        ):
+            if name_val not in (None, ""):
+                rows[_normalize_name(name_val)] = row_idx
+
+        found: Dict[int, int] = {}
+        for i in self._dirty:
+            row_idx = rows.get(_normalize_name(self._names[i]))
+            if row_idx is None:
+                raise ValueError(
+                    f"Medicine '{self._names[i]}' is no longer in the workbook; stock not saved."
+                )
+            found[i] = row_idx
+        for i, row_idx in found.items():
+            self._row_index[i] = row_idx
+        return headers["Stock"]
 
     def self_check(self) -> bool:
         """Verify required columns exist; returns True when valid."""
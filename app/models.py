@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, List
 
 
 @dataclass
@@ -22,17 +22,32 @@ class InvoiceItem:
 @dataclass
 class Invoice:
     items: List[InvoiceItem] = field(default_factory=list)
+    _by_name: Dict[str, InvoiceItem] = field(default_factory=dict, init=False, repr=False)
+    _subtotal: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        for item in self.items:
+            self._by_name[item.name] = item
+            self._subtotal += item.line_total
 
     def add_item(self, item: InvoiceItem) -> None:
         """Add or merge an item by medicine name."""
-        for existing in self.items:
-            if existing.name == item.name:
-                existing.qty += item.qty
-                return
+        existing = self._by_name.get(item.name)
+        if existing is not None:
+            existing.qty += item.qty
+            self._subtotal += existing.unit_price * item.qty
+            return
         self.items.append(item)
+        self._by_name[item.name] = item
+        self._subtotal += item.line_total
+
+    def qty_for(self, name: str) -> int:
+        """Return the quantity of ``name`` already on the invoice."""
+        item = self._by_name.get(name)
+        return item.qty if item is not None else 0
 
     def subtotal(self) -> float:
-        return sum(item.line_total for item in self.items)
+        return self._subtotal
 
     def discount_amount(self, percent: float) -> float:
         return self.subtotal() * (percent / 100.0)
@@ -1,10 +1,10 @@
 """Dataclasses representing medicines and invoice items."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Medicine:
     name: str
     mg: str
@@ -12,17 +12,23 @@ class Medicine:
     stock: int
     price: float
     actual_price: Optional[float] = None
+    # Resolved once at load time: Actual_Price when present, otherwise Price.
+    effective_price: float = field(init=False)
 
-    @property
-    def effective_price(self) -> float:
-        return self.actual_price if self.actual_price not in (None, "") else self.price
+    def __post_init__(self) -> None:
+        self.effective_price = self.actual_price if self.actual_price not in (None, "") else self.price
 
 
-@dataclass
+@dataclass(slots=True)
 class InvoiceItem:
     medicine: Medicine
     quantity: int
+    line_total: float = field(init=False)
 
-    @property
-    def line_total(self) -> float:
-        return self.quantity * self.medicine.effective_price
+    def __post_init__(self) -> None:
+        self.line_total = self.quantity * self.medicine.effective_price
+
+    def add_quantity(self, qty: int) -> None:
+        """Increase the quantity and keep ``line_total`` in step."""
+        self.quantity += qty
+        self.line_total = self.quantity * self.medicine.effective_price
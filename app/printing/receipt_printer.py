@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from html import escape
+from typing import Iterable, List, Tuple
 
 from PyQt5.QtGui import QTextDocument
 from PyQt5.QtPrintSupport import QPrinter
@@ -11,72 +12,114 @@ from PyQt5.QtCore import QSizeF
 from app import config
 from app.models.medicine import InvoiceItem
 
-
-class ReceiptPrinter:
-    """Render and print receipts as HTML to a target printer."""
-
-    def __init__(self, printer_name: str | None = None, receipt_width_mm: float | None = None) -> None:
-        self.printer_name = printer_name or config.PRINTER_NAME
-        self.receipt_width_mm = receipt_width_mm or config.RECEIPT_WIDTH_MM
-
-    def _build_html(self, items: Iterable[InvoiceItem], subtotal: float, discount_pct: float) -> str:
-        rows: List[str] = []
-        for item in items:
-            rows.append(
-                f"<tr><td>{item.medicine.name}</td>"
-                f"<td align='right'>{item.quantity}</td>"
-                f"<td align='right'>{item.medicine.effective_price:.2f}</td>"
-                f"<td align='right'>{item.line_total:.2f}</td></tr>"
-            )
-
-        discount_amount = subtotal * (discount_pct / 100)
-        net_total = subtotal - discount_amount
-
-        return f"""
+# Static parts of the receipt, assembled once at import; only the rows and
+# totals vary per print.
+_HEADER = (
+    """
         <html>
         <head>
             <style>
-                body {{ font-family: 'Arial'; font-size: 11pt; }}
-                h2 {{ text-align: center; margin: 0 0 6px 0; }}
-                table {{ width: 100%; border-collapse: collapse; }}
-                td {{ padding: 2px 0; }}
-                .totals td {{ padding-top: 4px; }}
+                body { font-family: 'Arial'; font-size: 11pt; }
+                h2 { text-align: center; margin: 0 0 6px 0; }
+                table { width: 100%; border-collapse: collapse; }
+                td { padding: 2px 0; }
+                .totals td { padding-top: 4px; }
             </style>
         </head>
         <body>
-            <h2>{config.STORE_HEADER}</h2>
+            <h2>"""
+    + config.STORE_HEADER
+    + """</h2>
             <table>
                 <tr><th align='left'>Item</th><th align='right'>Qty</th><th align='right'>Rate</th><th align='right'>Total</th></tr>
-                {''.join(rows)}
+                """
+)
+
+_FOOTER = """
             </table>
             <hr />
             <table class='totals'>
-                <tr><td>Subtotal</td><td align='right'>{subtotal:.2f}</td></tr>
-                <tr><td>Discount ({discount_pct:.1f}%)</td><td align='right'>-{discount_amount:.2f}</td></tr>
-                <tr><td><b>Net Total</b></td><td align='right'><b>{net_total:.2f}</b></td></tr>
+                <tr><td>Subtotal</td><td align='right'>%(subtotal).2f</td></tr>
+                <tr><td>Discount (%(discount_pct).1f%%)</td><td align='right'>-%(discount_amount).2f</td></tr>
+                <tr><td><b>Net Total</b></td><td align='right'><b>%(net_total).2f</b></td></tr>
             </table>
             <p style='text-align:center;margin-top:8px;'>Thank you!</p>
         </body>
         </html>
         """
 
-    def print_receipt(self, items: Iterable[InvoiceItem], subtotal: float, discount_pct: float) -> bool:
-        """Send receipt to printer; returns True on success."""
-        items_list = list(items)
-        printer = QPrinter(QPrinter.HighResolution)
-        printer.setPrinterName(self.printer_name)
 
-        if not printer.isValid():
-            return False
+class ReceiptPrinter:
+    """Render and print receipts as HTML to a target printer."""
+
+    _ROW_FMT = (
+        "<tr><td>{name}</td>"
+        "<td align='right'>{qty}</td>"
+        "<td align='right'>{price:.2f}</td>"
+        "<td align='right'>{total:.2f}</td></tr>"
+    )
+
+    def __init__(self, printer_name: str | None = None, receipt_width_mm: float | None = None) -> None:
+        self.printer_name = printer_name or config.PRINTER_NAME
+        self.receipt_width_mm = receipt_width_mm or config.RECEIPT_WIDTH_MM
+        self._printer = QPrinter(QPrinter.HighResolution)
+        self._valid = False
+        self._resolve_printer()
+
+    def _resolve_printer(self) -> None:
+        """Bind the cached QPrinter to the target printer (a spooler lookup)."""
+        self._printer.setPrinterName(self.printer_name)
+        self._printer.setFullPage(True)
+        self._valid = self._printer.isValid()
+
+    @classmethod
+    def render_rows(cls, items: Iterable[InvoiceItem]) -> Tuple[str, float, int]:
+        """Return (rows_html, subtotal, line_count) from a single pass over items."""
+        row_fmt = cls._ROW_FMT.format
+        rows: List[str] = []
+        subtotal = 0.0
+        for item in items:
+            price = item.medicine.effective_price
+            line_total = item.line_total
+            subtotal += line_total
+            rows.append(
+                row_fmt(name=escape(item.medicine.name), qty=item.quantity, price=price, total=line_total)
+            )
+        return "".join(rows), subtotal, len(rows)
+
+    def _build_html(self, rows_html: str, subtotal: float, discount_pct: float) -> str:
+        discount_amount = subtotal * (discount_pct / 100)
+        net_total = subtotal - discount_amount
+
+        return _HEADER + rows_html + _FOOTER % {
+            "subtotal": subtotal,
+            "discount_pct": discount_pct,
+            "discount_amount": discount_amount,
+            "net_total": net_total,
+        }
+
+    def print_receipt(
+        self, rows_html: str, line_count: int, subtotal: float, discount_pct: float
+    ) -> bool:
+        """Send receipt to printer; returns True on success.
+
+        ``rows_html``, ``subtotal`` and ``line_count`` come from ``render_rows``.
+        """
+        if not self._valid:
+            # The printer may have come online since the last attempt.
+            self._resolve_printer()
+            if not self._valid:
+                return False
+        printer = self._printer
 
         # Dynamic height to avoid truncation; 40mm base plus 8mm per line.
-        height_mm = 40 + (len(items_list) * 8)
+        height_mm = 40 + (line_count * 8)
         printer.setPaperSize(QSizeF(self.receipt_width_mm, height_mm), QPrinter.Millimeter)
-        printer.setFullPage(True)
 
         doc = QTextDocument()
-        doc.setHtml(self._build_html(items_list, subtotal, discount_pct))
+        doc.setHtml(self._build_html(rows_html, subtotal, discount_pct))
         doc.setPageSize(QSizeF(self.receipt_width_mm, height_mm))
 
         doc.print_(printer)
-        return printer.isValid()
+        self._valid = printer.isValid()
+        return self._valid
@@ -0,0 +1,142 @@
+"""SQLite-backed data store for pharmacy inventory."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app import config
+from app.data_store import ExcelDataStore, _normalize_name
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS medicines (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    norm_name TEXT NOT NULL,
+    mg TEXT NOT NULL DEFAULT '',
+    rack TEXT NOT NULL DEFAULT '',
+    stock INTEGER NOT NULL DEFAULT 0,
+    price REAL NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_medicines_norm_name ON medicines (norm_name);
+"""
+
+_COLUMNS = {"id", "name", "norm_name", "mg", "rack", "stock", "price"}
+
+
+class SqliteDataStore:
+    """Loads and mutates inventory from a SQLite database.
+
+    The database is filled from the Excel workbook the first time it is opened
+    and is the source of truth from then on; the workbook is not written back.
+    Mirrors the ``ExcelDataStore`` API so the UI can use either.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = None,
+        excel_path: Path | str = None,
+        sheet_name: str | None = None,
+    ) -> None:
+        self.path: Path = Path(path) if path else config.SQLITE_PATH
+        self.excel_path: Path = Path(excel_path) if excel_path else config.EXCEL_PATH
+        self.sheet_name = sheet_name or config.EXCEL_SHEET_NAME
+        # save() runs on a worker thread after printing; the lock serializes access.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        if not self._conn.execute("SELECT 1 FROM medicines LIMIT 1").fetchone():
+            self._import_excel()
+
+    def _import_excel(self) -> None:
+        """Copy the workbook inventory into the empty database (done once)."""
+        source = ExcelDataStore(self.excel_path, self.sheet_name)
+        rows = []
+        for name in source.get_all_names():
+            record = source.get_medicine(name)
+            rows.append(
+                (
+                    record["name"],
+                    _normalize_name(name),
+                    record["mg"],
+                    record["rack"],
+                    record["stock"],
+                    record["price"],
+                )
+            )
+        with self._conn:
+            # Duplicate names keep the last row, as ExcelDataStore does.
+            self._conn.executemany(
+                "INSERT INTO medicines (name, norm_name, mg, rack, stock, price) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (norm_name) DO UPDATE SET "
+                "name = excluded.name, mg = excluded.mg, rack = excluded.rack, "
+                "stock = excluded.stock, price = excluded.price",
+                rows,
+            )
+
+    def get_all_names(self) -> List[str]:
+        """Return display names in import order."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM medicines ORDER BY id")]
+
+    def get_medicine(self, name: str) -> Optional[Dict]:
+        """Return a record dict or None if not found."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, mg, rack, stock, price FROM medicines WHERE norm_name = ?",
+                (_normalize_name(name),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"name": row[0], "mg": row[1], "rack": row[2], "stock": row[3], "price": row[4]}
+
+    def reduce_stock(self, name: str, qty: int) -> None:
+        """Reduce stock for a medicine. Raises if insufficient."""
+        self.batch_reduce_stock({name: qty})
+
+    def batch_reduce_stock(self, deltas: Dict[str, int]) -> None:
+        """Reduce stock for several medicines at once.
+
+        Every entry is validated before any stock changes, so a failure leaves
+        the store untouched. Changes are committed by ``save()``.
+        """
+        by_norm: Dict[str, int] = {}
+        requested: Dict[str, str] = {}
+        for name, qty in deltas.items():
+            if qty <= 0:
+                raise ValueError("Quantity must be positive.")
+            norm = _normalize_name(name)
+            by_norm[norm] = by_norm.get(norm, 0) + qty
+            requested.setdefault(norm, name)
+
+        with self._lock:
+            updates = []
+            for norm, qty in by_norm.items():
+                row = self._conn.execute(
+                    "SELECT id, name, stock FROM medicines WHERE norm_name = ?", (norm,)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"Medicine '{requested[norm]}' not found.")
+                row_id, display_name, stock = row
+                if stock < qty:
+                    raise ValueError(
+                        f"Insufficient stock for '{display_name}'. "
+                        f"Available: {stock}, requested: {qty}."
+                    )
+                updates.append((qty, row_id))
+            self._conn.executemany("UPDATE medicines SET stock = stock - ? WHERE id = ?", updates)
+
+    def save(self) -> None:
+        """Persist changes to disk."""
+        with self._lock:
+            self._conn.commit()
+
+    def self_check(self) -> bool:
+        """Verify the inventory table has the expected columns; returns True when valid."""
+        with self._lock:
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(medicines)")}
+        return _COLUMNS <= columns
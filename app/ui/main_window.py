@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QObject, QRunnable, Qt, QThreadPool, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
     QAbstractItemView,
-    QCompleter,
     QDoubleSpinBox,
     QFormLayout,
     QGridLayout,
@@ -28,6 +27,30 @@ from PyQt5.QtWidgets import (
 from app.data.excel_repo import ExcelRepository
 from app.models.medicine import InvoiceItem, Medicine
 from app.printing.receipt_printer import ReceiptPrinter
+from app.ui.name_completer import NameCompleter
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class _Task(QRunnable):
+    """Run a callable on the thread pool and report the outcome via signals."""
+
+    def __init__(self, fn: Callable[[], object]) -> None:
+        super().__init__()
+        self.fn = fn
+        # Created on the UI thread, so connected slots run there too.
+        self.signals = _TaskSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.fn()
+        except Exception as exc:  # noqa: BLE001 - reported back to the UI thread
+            self.signals.failed.emit(str(exc))
+            return
+        self.signals.finished.emit(result)
 
 
 class MainWindow(QMainWindow):
@@ -41,8 +64,14 @@ class MainWindow(QMainWindow):
         self.repo: Optional[ExcelRepository] = None
         self.medicines_by_name: Dict[str, Medicine] = {}
         self.invoice_items: List[InvoiceItem] = []
+        self.invoice_items_by_name: Dict[str, InvoiceItem] = {}
+        self._subtotal = 0.0
+        self._rendered_rows: Dict[str, int] = {}
         self.invoice_quantities: Dict[str, int] = {}
         self.selected_medicine: Optional[Medicine] = None
+        self._pending_search = ""
+        self._tasks: List[_Task] = []
+        self.printer = ReceiptPrinter()
 
         self._build_ui()
         self._load_inventory()
@@ -57,6 +86,11 @@ class MainWindow(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search medicine name...")
         self.search_input.textChanged.connect(self._on_search_text_changed)
+        # Coalesce bursts of keystrokes into a single lookup.
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(60)
+        self._search_timer.timeout.connect(self._apply_search)
         search_layout.addWidget(QLabel("Medicine:"))
         search_layout.addWidget(self.search_input, 1)
 
@@ -90,6 +124,9 @@ class MainWindow(QMainWindow):
         self.table = QTableWidget(0, 6)
         self.table.setHorizontalHeaderLabels(["Medicine", "MG", "Rack", "Qty", "Price", "Total"])
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Fixed widths so adding rows never triggers a measure of every cell.
+        for col, width in enumerate((240, 70, 70, 60, 80)):
+            self.table.setColumnWidth(col, width)
         self.table.horizontalHeader().setStretchLastSection(True)
 
         # Totals
@@ -123,21 +160,52 @@ class MainWindow(QMainWindow):
         central.setLayout(root_layout)
         self.setCentralWidget(central)
 
+    def _start_task(
+        self,
+        fn: Callable[[], object],
+        on_finished: Callable[[object], None],
+        on_failed: Callable[[str], None],
+    ) -> None:
+        """Run ``fn`` off the UI thread; callbacks are delivered on the UI thread."""
+        task = _Task(fn)
+        task.signals.finished.connect(on_finished)
+        task.signals.failed.connect(on_failed)
+        # Hold a reference until the task reports back.
+        self._tasks.append(task)
+        task.signals.finished.connect(lambda _: self._tasks.remove(task))
+        task.signals.failed.connect(lambda _: self._tasks.remove(task))
+        QThreadPool.globalInstance().start(task)
+
+    def closeEvent(self, event) -> None:  # noqa: N802 - Qt override
+        # Let a running stock save finish so the workbook is not left half-written.
+        QThreadPool.globalInstance().waitForDone()
+        super().closeEvent(event)
+
     def _load_inventory(self) -> None:
-        """Load medicines from Excel and configure completer."""
+        """Load medicines from Excel in the background, then configure completer."""
         self.repo = None
-        try:
-            self.repo = ExcelRepository()
-            medicines = self.repo.list_medicines()
-        except Exception as exc:  # noqa: BLE001 - surface Excel issues to user
-            QMessageBox.critical(self, "Error", f"Failed to load Excel inventory:\n{exc}")
-            medicines = []
-
+        self.print_button.setEnabled(False)
+        self.statusBar().showMessage("Loading inventory...")
+        self._start_task(self._read_inventory, self._on_inventory_loaded, self._on_inventory_failed)
+
+    @staticmethod
+    def _read_inventory() -> tuple:
+        repo = ExcelRepository()
+        return repo, repo.list_medicines()
+
+    def _on_inventory_loaded(self, result: tuple) -> None:
+        self.repo, medicines = result
+        self._set_inventory(medicines)
+
+    def _on_inventory_failed(self, message: str) -> None:
+        QMessageBox.critical(self, "Error", f"Failed to load Excel inventory:\n{message}")
+        self._set_inventory([])
+
+    def _set_inventory(self, medicines: List[Medicine]) -> None:
+        self.statusBar().clearMessage()
+        self.print_button.setEnabled(True)
         self.medicines_by_name = {m.name: m for m in medicines}
-        completer = QCompleter(list(self.medicines_by_name.keys()))
-        completer.setCaseSensitivity(Qt.CaseInsensitive)
-        completer.setFilterMode(Qt.MatchContains)
-        completer.setCompletionMode(QCompleter.PopupCompletion)
+        completer = NameCompleter(self.medicines_by_name.keys(), self)
         completer.activated[str].connect(self._on_medicine_selected)
         self.search_input.setCompleter(completer)
         self._clear_selection()
@@ -150,6 +218,11 @@ class MainWindow(QMainWindow):
         self.price_label.setText("-")
 
     def _on_search_text_changed(self, text: str) -> None:
+        self._pending_search = text
+        self._search_timer.start()
+
+    def _apply_search(self) -> None:
+        text = self._pending_search
         if text in self.medicines_by_name:
             self._on_medicine_selected(text)
 
@@ -183,39 +256,49 @@ class MainWindow(QMainWindow):
             )
             return
 
-        self._add_or_update_item(self.selected_medicine, qty)
-        self._refresh_table()
+        item = self._add_or_update_item(self.selected_medicine, qty)
+        self._render_item(item)
         self._update_totals()
         self._on_medicine_selected(self.selected_medicine.name)
 
-    def _add_or_update_item(self, medicine: Medicine, qty: int) -> None:
+    def _add_or_update_item(self, medicine: Medicine, qty: int) -> InvoiceItem:
         """Add new item or increase quantity if already present."""
-        for item in self.invoice_items:
-            if item.medicine.name == medicine.name:
-                item.quantity += qty
-                break
+        item = self.invoice_items_by_name.get(medicine.name)
+        if item is not None:
+            item.add_quantity(qty)
         else:
-            self.invoice_items.append(InvoiceItem(medicine=medicine, quantity=qty))
+            item = InvoiceItem(medicine=medicine, quantity=qty)
+            self.invoice_items.append(item)
+            self.invoice_items_by_name[medicine.name] = item
+        self._subtotal += qty * medicine.effective_price
 
         self.invoice_quantities[medicine.name] = self.invoice_quantities.get(medicine.name, 0) + qty
+        return item
+
+    def _render_item(self, item: InvoiceItem) -> None:
+        """Update the row for an existing item or append a row for a new one."""
+        row = self._rendered_rows.get(item.medicine.name)
+        if row is not None:
+            self.table.item(row, 3).setText(str(item.quantity))
+            self.table.item(row, 5).setText(f"{item.line_total:.2f}")
+            return
 
-    def _refresh_table(self) -> None:
-        self.table.setRowCount(len(self.invoice_items))
-        for row, item in enumerate(self.invoice_items):
-            values = [
-                item.medicine.name,
-                item.medicine.mg,
-                item.medicine.rack_number,
-                str(item.quantity),
-                f"{item.medicine.effective_price:.2f}",
-                f"{item.line_total:.2f}",
-            ]
-            for col, value in enumerate(values):
-                self.table.setItem(row, col, QTableWidgetItem(value))
-        self.table.resizeColumnsToContents()
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        values = [
+            item.medicine.name,
+            item.medicine.mg,
+            item.medicine.rack_number,
+            str(item.quantity),
+            f"{item.medicine.effective_price:.2f}",
+            f"{item.line_total:.2f}",
+        ]
+        for col, value in enumerate(values):
+            self.table.setItem(row, col, QTableWidgetItem(value))
+        self._rendered_rows[item.medicine.name] = row
 
     def _update_totals(self) -> None:
-        subtotal = sum(item.line_total for item in self.invoice_items)
+        subtotal = self._subtotal
         discount_pct = float(self.discount_spin.value())
         net_total = subtotal * (1 - discount_pct / 100)
         self.subtotal_value.setText(f"{subtotal:.2f}")
@@ -226,10 +309,10 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Nothing to print", "Add at least one item to the invoice.")
             return
 
-        subtotal = sum(item.line_total for item in self.invoice_items)
+        # Rows and subtotal for the receipt come from one pass over the invoice.
+        rows_html, subtotal, line_count = ReceiptPrinter.render_rows(self.invoice_items)
         discount_pct = float(self.discount_spin.value())
-        printer = ReceiptPrinter()
-        success = printer.print_receipt(self.invoice_items, subtotal, discount_pct)
+        success = self.printer.print_receipt(rows_html, line_count, subtotal, discount_pct)
 
         if not success:
             QMessageBox.critical(self, "Print Failed", "Printer is not available or failed to print.")
@@ -237,25 +320,55 @@ class MainWindow(QMainWindow):
 
         try:
             self._persist_stock_changes()
-            QMessageBox.information(self, "Printed", "Receipt sent to printer and stock updated.")
-            self._reset_invoice()
         except Exception as exc:  # noqa: BLE001
             QMessageBox.critical(self, "Excel Error", f"Could not update Excel stock:\n{exc}")
 
     def _persist_stock_changes(self) -> None:
-        """Write new stock levels back to Excel."""
+        """Write new stock levels back to Excel in the background."""
         if not self.repo:
             raise RuntimeError("Inventory repository is not initialized.")
         new_levels: Dict[str, int] = {}
-        for med in self.medicines_by_name.values():
-            used = self.invoice_quantities.get(med.name, 0)
-            new_levels[med.name] = max(med.stock - used, 0)
-        self.repo.save_stock_updates(new_levels)
+        for name, used in self.invoice_quantities.items():
+            med = self.medicines_by_name[name]
+            new_levels[name] = max(med.stock - used, 0)
+
+        repo = self.repo
+
+        def save() -> Dict[str, int]:
+            repo.save_stock_updates(new_levels)
+            return new_levels
+
+        # The invoice stays as-is until the save completes or fails.
+        self.add_button.setEnabled(False)
+        self.print_button.setEnabled(False)
+        self.statusBar().showMessage("Saving stock to Excel...")
+        self._start_task(save, self._on_stock_saved, self._on_stock_save_failed)
+
+    def _on_stock_saved(self, new_levels: Dict[str, int]) -> None:
+        # Keep the in-memory inventory in step so the next invoice needs no re-read.
+        for name, level in new_levels.items():
+            self.medicines_by_name[name].stock = level
+        self._end_save()
+        QMessageBox.information(self, "Printed", "Receipt sent to printer and stock updated.")
+        self._reset_invoice()
+
+    def _on_stock_save_failed(self, message: str) -> None:
+        self._end_save()
+        QMessageBox.critical(self, "Excel Error", f"Could not update Excel stock:\n{message}")
+
+    def _end_save(self) -> None:
+        self.statusBar().clearMessage()
+        self.add_button.setEnabled(True)
+        self.print_button.setEnabled(True)
 
     def _reset_invoice(self) -> None:
         self.invoice_items.clear()
+        self.invoice_items_by_name.clear()
+        self._subtotal = 0.0
         self.invoice_quantities.clear()
+        self._rendered_rows.clear()
         self.table.setRowCount(0)
         self.discount_spin.setValue(0.0)
         self._update_totals()
-        self._load_inventory()
+        self.search_input.clear()
+        self._clear_selection()
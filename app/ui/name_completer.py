@@ -0,0 +1,92 @@
+"""Medicine name search for the search box completer."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, List
+
+from PyQt5.QtCore import QStringListModel, Qt
+from PyQt5.QtWidgets import QCompleter
+
+
+class NameIndex:
+    """Case-insensitive prefix and substring search over a fixed list of names.
+
+    All names are folded into one newline-separated buffer so a substring
+    query is a handful of ``str.find`` calls over that buffer instead of one
+    comparison per name. Hits are mapped back to names through the start
+    offsets. Prefix queries bisect a sorted copy of the folded names.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._names: List[str] = list(names)
+        folded = [name.casefold() for name in self._names]
+        self._joined = "\n".join(folded)
+        self._starts: List[int] = [0, *accumulate(len(name) + 1 for name in folded)][:-1]
+        order = sorted(range(len(folded)), key=folded.__getitem__)
+        self._sorted_keys: List[str] = [folded[i] for i in order]
+        self._sorted_names: List[str] = [self._names[i] for i in order]
+
+    def prefix(self, text: str) -> List[str]:
+        """Return names starting with ``text``, in case-folded sort order."""
+        needle = text.casefold()
+        keys = self._sorted_keys
+        lo = bisect_left(keys, needle)
+        hi = lo
+        while hi < len(keys) and keys[hi].startswith(needle):
+            hi += 1
+        return self._sorted_names[lo:hi]
+
+    def contains(self, text: str) -> List[str]:
+        """Return names containing ``text``, in their original order."""
+        needle = text.casefold()
+        if not needle:
+            return list(self._names)
+        if "\n" in needle:
+            return []
+
+        matches: List[str] = []
+        find = self._joined.find
+        starts = self._starts
+        last = len(starts) - 1
+        pos = find(needle)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            matches.append(self._names[i])
+            if i == last:
+                break
+            pos = find(needle, starts[i + 1])
+        return matches
+
+
+class NameCompleter(QCompleter):
+    """Popup completer whose candidates come from a ``NameIndex``.
+
+    With ``prefix_first`` the candidates are the prefix matches, falling back
+    to substring matches only when no name starts with the typed text.
+    """
+
+    def __init__(self, names: Iterable[str], parent=None, prefix_first: bool = False) -> None:
+        self._model = QStringListModel()
+        super().__init__(self._model, parent)
+        self._model.setParent(self)
+        self._index = NameIndex(names)
+        self._prefix_first = prefix_first
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setCompletionMode(QCompleter.PopupCompletion)
+
+    def set_names(self, names: Iterable[str]) -> None:
+        """Replace the candidate names, keeping the completer and its connections."""
+        self._index = NameIndex(names)
+        self._model.setStringList([])
+
+    def splitPath(self, path: str) -> List[str]:
+        # Narrow the model to the matching names; every remaining row is a match,
+        # so Qt's own filter is handed an empty prefix.
+        matches = self._index.prefix(path) if self._prefix_first else []
+        if not matches:
+            matches = self._index.contains(path)
+        if matches != self._model.stringList():
+            self._model.setStringList(matches)
+        return [""]
@@ -2,15 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Dict, Optional
+from html import escape
+from string import Template
+from typing import Dict, List, Optional, Union
 
-from PyQt5.QtCore import Qt, QStringListModel
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 from PyQt5.QtPrintSupport import QPrinter
 from PyQt5.QtGui import QTextDocument
 from PyQt5.QtWidgets import (
     QApplication,
-    QCompleter,
     QDoubleSpinBox,
     QFormLayout,
     QGridLayout,
@@ -29,8 +30,71 @@ from PyQt5.QtWidgets import (
 )
 
 from app import config
-from app.data_store import ExcelDataStore
+from app.data_store import ExcelDataStore, _normalize_name
+from app.sqlite_store import SqliteDataStore
 from app.models import Invoice, InvoiceItem, format_currency
+from app.ui.name_completer import NameCompleter
+
+DataStore = Union[ExcelDataStore, SqliteDataStore]
+
+# config.STORE_BACKEND value -> store class.
+_STORE_BACKENDS = {"excel": ExcelDataStore, "sqlite": SqliteDataStore}
+
+_RECEIPT_TEMPLATE = Template(
+    """
+        <html>
+        <head>
+            <style>
+                body { font-family: Arial; font-size: 11pt; }
+                h2 { text-align: center; margin: 0 0 8px 0; }
+                table { width: 100%; border-collapse: collapse; }
+                th, td { padding: 2px 0; }
+                .totals td { padding-top: 4px; }
+            </style>
+        </head>
+        <body>
+            <h2>$header</h2>
+            <p>$customer_line</p>
+            <table>
+                <tr><th align='left'>Item</th><th align='right'>Qty</th><th align='right'>Rate</th><th align='right'>Total</th></tr>
+                $rows
+            </table>
+            <hr />
+            <table class='totals'>
+                <tr><td>Subtotal</td><td align='right'>$subtotal</td></tr>
+                <tr><td>Discount ($discount_pct%)</td><td align='right'>-$discount_amt</td></tr>
+                <tr><td><b>Net Total</b></td><td align='right'><b>$net</b></td></tr>
+            </table>
+        </body>
+        </html>
+        """
+)
+
+_ROW_TMPL = (
+    "<tr><td>{name}</td>"
+    "<td align='right'>{qty}</td>"
+    "<td align='right'>{price:.2f}</td>"
+    "<td align='right'>{total:.2f}</td></tr>"
+)
+
+
+class SaveWorker(QObject):
+    """Runs ``store.save()`` on a worker thread."""
+
+    # Emits None on success, otherwise the exception raised by save().
+    finished = pyqtSignal(object)
+
+    def __init__(self, store: DataStore) -> None:
+        super().__init__()
+        self.store = store
+
+    def run(self) -> None:
+        try:
+            self.store.save()
+        except Exception as exc:  # noqa: BLE001 - handed back to the UI thread
+            self.finished.emit(exc)
+            return
+        self.finished.emit(None)
 
 
 class MainWindow(QMainWindow):
@@ -41,14 +105,26 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Pharmacy Invoice Generator")
         self.resize(1000, 600)
 
-        self.store: Optional[ExcelDataStore] = None
+        self.store: Optional[DataStore] = None
         self.invoice = Invoice()
-        self.added_qty: Dict[str, int] = {}
         self.selected_name: Optional[str] = None
-        self._name_model = QStringListModel()
-        self._completer: Optional[QCompleter] = None
+        # Record shown in the detail labels; reused by add instead of a second lookup.
+        self._selected_record: Optional[Dict] = None
+        self._completer: Optional[NameCompleter] = None
+        # Normalized name -> record, filled once per load so lookups skip the store.
+        self._record_cache: Dict[str, Dict] = {}
+        self._pending_text = ""
+        # Table row per medicine name; rows follow the order of invoice.items.
+        self._row_by_name: Dict[str, int] = {}
+        # Cell items per table row, created once on insert and updated via setText.
+        self._cell_items: List[List[QTableWidgetItem]] = []
+        # Rendered, escaped receipt row per table row; kept in step on add.
+        self._rows_cache: List[str] = []
+        # Running save threads and their workers, held until each thread finishes.
+        self._save_jobs: Dict[QThread, SaveWorker] = {}
 
         self._build_ui()
+        self._init_completer()
         self._load_store()
 
     def _build_ui(self) -> None:
@@ -70,6 +146,11 @@ class MainWindow(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search medicine...")
         self.search_input.textChanged.connect(self._on_search_text)
+        # Only the last keystroke in a burst runs the lookup.
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(80)
+        self._search_timer.timeout.connect(self._run_search)
         self.search_input.returnPressed.connect(self._on_search_enter)
         layout.addWidget(QLabel("Medicine"))
         layout.addWidget(self.search_input)
@@ -104,6 +185,9 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout()
         self.table = QTableWidget(0, 5)
         self.table.setHorizontalHeaderLabels(["Medicine", "MG", "Qty", "Price", "Total"])
+        # Fixed widths so adding rows never triggers a measure of every cell.
+        for col, width in enumerate((260, 80, 60, 90)):
+            self.table.setColumnWidth(col, width)
         self.table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.table, 1)
         return layout
@@ -154,36 +238,57 @@ class MainWindow(QMainWindow):
 
     def _load_store(self) -> None:
         try:
-            self.store = ExcelDataStore()
+            store_cls = _STORE_BACKENDS.get(config.STORE_BACKEND)
+            if store_cls is None:
+                raise ValueError(
+                    f"Unknown STORE_BACKEND {config.STORE_BACKEND!r}; "
+                    f"expected one of: {', '.join(_STORE_BACKENDS)}."
+                )
+            self.store = store_cls()
             if not self.store.self_check():
-                raise ValueError("Excel sheet missing required columns.")
+                raise ValueError("Inventory data is missing required columns.")
             names = self.store.get_all_names()
+            self._record_cache = {
+                _normalize_name(name): self.store.get_medicine(name) for name in names
+            }
         except Exception as exc:  # noqa: BLE001
-            QMessageBox.critical(self, "Excel Error", f"Failed to load Excel: {exc}")
+            QMessageBox.critical(self, "Inventory Error", f"Failed to load inventory: {exc}")
             self.add_button.setEnabled(False)
             self.print_button.setEnabled(False)
             names = []
+            self._record_cache = {}
+
+        self._completer.set_names(names)
 
-        self._name_model.setStringList(names)
-        completer = QCompleter(self._name_model, self)
-        completer.setCaseSensitivity(Qt.CaseInsensitive)
-        completer.setFilterMode(Qt.MatchContains)
-        completer.setCompletionMode(QCompleter.PopupCompletion)
+    def _init_completer(self) -> None:
+        """Attach the search completer once; _load_store only swaps its names."""
+        completer = NameCompleter([], self, prefix_first=True)
         completer.activated[str].connect(self._select_medicine)
         self._completer = completer
         self.search_input.setCompleter(completer)
 
+    def _lookup(self, name: str) -> Optional[Dict]:
+        """Return the cached record for ``name`` (case-insensitive) or None.
+
+        Keys use the store's own normalization so the cache never merges names
+        the store keeps apart.
+        """
+        return self._record_cache.get(_normalize_name(name))
+
     def _on_search_text(self, text: str) -> None:
+        self._pending_text = text
+        self._search_timer.start()
+
+    def _run_search(self) -> None:
+        text = self._pending_text
         if not text:
             self._clear_selection()
             return
         if not self.store:
             return
-        if self._completer:
-            self._completer.setCompletionPrefix(text)
-            self._completer.complete()
+        # The completer attached to search_input filters and pops up on its own.
         # Try exact match first (case-insensitive)
-        record = self.store.get_medicine(text)
+        record = self._lookup(text)
         if record:
             self._select_medicine(record["name"])
 
@@ -192,21 +297,22 @@ class MainWindow(QMainWindow):
         text = self.search_input.text().strip()
         if not text or not self.store:
             return
-        record = self.store.get_medicine(text)
+        record = self._lookup(text)
         if record:
             self._select_medicine(record["name"])
         else:
-            QMessageBox.information(self, "Not found", "Medicine not found in Excel.")
+            QMessageBox.information(self, "Not found", "Medicine not found in inventory.")
             self._clear_selection()
 
     def _select_medicine(self, name: str) -> None:
         if not self.store:
             return
-        record = self.store.get_medicine(name)
+        record = self._lookup(name)
         if not record:
             self._clear_selection()
             return
         self.selected_name = record["name"]
+        self._selected_record = record
         self.mg_label.setText(record["mg"])
         self.rack_label.setText(record["rack"])
         self.stock_label.setText(str(self._available_stock(record["name"])))
@@ -214,6 +320,7 @@ class MainWindow(QMainWindow):
 
     def _clear_selection(self) -> None:
         self.selected_name = None
+        self._selected_record = None
         self.mg_label.setText("-")
         self.rack_label.setText("-")
         self.stock_label.setText("-")
@@ -222,17 +329,19 @@ class MainWindow(QMainWindow):
     def _available_stock(self, name: str) -> int:
         if not self.store:
             return 0
-        record = self.store.get_medicine(name)
+        record = self._selected_record
+        if record is None or record["name"] != name:
+            record = self._lookup(name)
         if not record:
             return 0
-        used = self.added_qty.get(record["name"], 0)
+        used = self.invoice.qty_for(record["name"])
         return max(record["stock"] - used, 0)
 
     def _add_to_invoice(self) -> None:
         if not self.store or not self.selected_name:
             QMessageBox.warning(self, "Select medicine", "Please select a medicine first.")
             return
-        record = self.store.get_medicine(self.selected_name)
+        record = self._selected_record
         if not record:
             QMessageBox.warning(self, "Missing", "Selected medicine not found.")
             return
@@ -255,79 +364,79 @@ class MainWindow(QMainWindow):
             qty=qty,
         )
         self.invoice.add_item(item)
-        self.added_qty[record["name"]] = self.added_qty.get(record["name"], 0) + qty
-        self._refresh_table()
+        row = self._row_by_name.get(item.name)
+        if row is None:
+            self._append_row(item)
+            self._rows_cache.append(self._receipt_row(item))
+        else:
+            merged = self.invoice.items[row]
+            self._update_row(row, merged)
+            self._rows_cache[row] = self._receipt_row(merged)
         self._update_totals()
-        self._select_medicine(record["name"])
-
-    def _refresh_table(self) -> None:
-        self.table.setRowCount(len(self.invoice.items))
-        for row, item in enumerate(self.invoice.items):
-            values = [
-                item.name,
-                item.mg,
-                str(item.qty),
-                format_currency(item.unit_price),
-                format_currency(item.line_total),
-            ]
-            for col, val in enumerate(values):
-                self.table.setItem(row, col, QTableWidgetItem(val))
-        self.table.resizeColumnsToContents()
+        # Only the stock figure changes; the other detail labels still match.
+        self.stock_label.setText(str(self._available_stock(record["name"])))
+
+    def _append_row(self, item: InvoiceItem) -> None:
+        values = [
+            item.name,
+            item.mg,
+            str(item.qty),
+            format_currency(item.unit_price),
+            format_currency(item.line_total),
+        ]
+        cells = [QTableWidgetItem(val) for val in values]
+        row = self.table.rowCount()
+        self.table.setUpdatesEnabled(False)
+        self.table.blockSignals(True)
+        self.table.insertRow(row)
+        for col, cell in enumerate(cells):
+            self.table.setItem(row, col, cell)
+        self.table.blockSignals(False)
+        self.table.setUpdatesEnabled(True)
+        self._row_by_name[item.name] = row
+        self._cell_items.append(cells)
+
+    def _update_row(self, row: int, item: InvoiceItem) -> None:
+        """Refresh the quantity and total cells of a merged line."""
+        cells = self._cell_items[row]
+        cells[2].setText(str(item.qty))
+        cells[4].setText(format_currency(item.line_total))
 
     def _update_totals(self) -> None:
-        net = self.invoice.net_total(self.discount_spin.value())
+        subtotal = self.invoice.subtotal()
+        net = subtotal - subtotal * (self.discount_spin.value() / 100.0)
         self.total_label.setText(format_currency(net))
 
+    @staticmethod
+    def _receipt_row(item: InvoiceItem) -> str:
+        return _ROW_TMPL.format(
+            name=escape(item.name), qty=item.qty, price=item.unit_price, total=item.line_total
+        )
+
     def _build_receipt_html(self) -> str:
-        rows = []
-        for item in self.invoice.items:
-            rows.append(
-                f"<tr><td>{item.name}</td>"
-                f"<td align='right'>{item.qty}</td>"
-                f"<td align='right'>{item.unit_price:.2f}</td>"
-                f"<td align='right'>{item.line_total:.2f}</td></tr>"
-            )
         subtotal = self.invoice.subtotal()
         discount_pct = self.discount_spin.value()
-        discount_amt = self.invoice.discount_amount(discount_pct)
-        net = self.invoice.net_total(discount_pct)
-        customer = self.customer_name.text().strip()
-        phone = self.customer_phone.text().strip()
+        discount_amt = subtotal * (discount_pct / 100.0)
+        net = subtotal - discount_amt
+        customer = escape(self.customer_name.text().strip())
+        phone = escape(self.customer_phone.text().strip())
         customer_line = customer or "Walk-in Customer"
         if phone:
             customer_line += f" ({phone})"
 
-        return f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial; font-size: 11pt; }}
-                h2 {{ text-align: center; margin: 0 0 8px 0; }}
-                table {{ width: 100%; border-collapse: collapse; }}
-                th, td {{ padding: 2px 0; }}
-                .totals td {{ padding-top: 4px; }}
-            </style>
-        </head>
-        <body>
-            <h2>{config.STORE_HEADER}</h2>
-            <p>{customer_line}</p>
-            <table>
-                <tr><th align='left'>Item</th><th align='right'>Qty</th><th align='right'>Rate</th><th align='right'>Total</th></tr>
-                {''.join(rows)}
-            </table>
-            <hr />
-            <table class='totals'>
-                <tr><td>Subtotal</td><td align='right'>{subtotal:.2f}</td></tr>
-                <tr><td>Discount ({discount_pct:.1f}%)</td><td align='right'>-{discount_amt:.2f}</td></tr>
-                <tr><td><b>Net Total</b></td><td align='right'><b>{net:.2f}</b></td></tr>
-            </table>
-        </body>
-        </html>
-        """
+        return _RECEIPT_TEMPLATE.substitute(
+            header=config.STORE_HEADER,
+            customer_line=customer_line,
+            rows="".join(self._rows_cache),
+            subtotal=f"{subtotal:.2f}",
+            discount_pct=f"{discount_pct:.1f}",
+            discount_amt=f"{discount_amt:.2f}",
+            net=f"{net:.2f}",
+        )
 
     def _on_print(self) -> None:
         if not self.store:
-            QMessageBox.warning(self, "Excel not loaded", "Cannot print without Excel data.")
+            QMessageBox.warning(self, "Inventory not loaded", "Cannot print without inventory data.")
             return
         if not self.invoice.items:
             QMessageBox.information(self, "No items", "Add at least one item to print.")
@@ -343,26 +452,68 @@ class MainWindow(QMainWindow):
         doc.setHtml(self._build_receipt_html())
         doc.print_(printer)
 
+        deltas = {item.name: item.qty for item in self.invoice.items}
         try:
-            for item in self.invoice.items:
-                self.store.reduce_stock(item.name, item.qty)
-            self.store.save()
+            self.store.batch_reduce_stock(deltas)
         except Exception as exc:  # noqa: BLE001
-            QMessageBox.critical(self, "Excel Error", f"Failed to update stock: {exc}")
+            QMessageBox.critical(self, "Inventory Error", f"Failed to update stock: {exc}")
             return
+        for name, qty in deltas.items():
+            record = self._lookup(name)
+            if record is not None:
+                record["stock"] -= qty
 
-        QMessageBox.information(self, "Printed", "Receipt sent to printer and stock updated.")
+        self._start_save()
         self._clear_invoice()
 
+    def _start_save(self) -> None:
+        """Write the workbook on a worker thread; PRINT stays disabled until done."""
+        self.print_button.setEnabled(False)
+        thread = QThread(self)
+        worker = SaveWorker(self.store)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(self._on_save_done)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.finished.connect(lambda: self._on_save_thread_finished(thread))
+        self._save_jobs[thread] = worker
+        thread.start()
+
+    def _on_save_done(self, error: Optional[Exception]) -> None:
+        self.print_button.setEnabled(True)
+        if error is not None:
+            QMessageBox.critical(self, "Inventory Error", f"Failed to update stock: {error}")
+            return
+        QMessageBox.information(self, "Printed", "Receipt sent to printer and stock updated.")
+
+    def _on_save_thread_finished(self, thread: QThread) -> None:
+        # The worker lives on the save thread; keep it referenced until that thread
+        # has stopped so it is deleted there via deleteLater, not here by sip.
+        self._save_jobs.pop(thread, None)
+
+    def closeEvent(self, event) -> None:  # noqa: N802 - Qt override
+        # Let a pending save finish so the workbook is not left half-written.
+        for thread in list(self._save_jobs):
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
+
     def _clear_invoice(self) -> None:
         self.invoice = Invoice()
-        self.added_qty.clear()
+        self._row_by_name.clear()
+        self._cell_items.clear()
+        self._rows_cache.clear()
+        # Reset quietly and recompute the totals once at the end.
+        self.table.blockSignals(True)
         self.table.setRowCount(0)
+        self.table.blockSignals(False)
+        self.discount_spin.blockSignals(True)
         self.discount_spin.setValue(0.0)
+        self.discount_spin.blockSignals(False)
         self._update_totals()
         self._clear_selection()
-        if self.store:
-            self._load_store()
 
 
 if __name__ == "__main__":
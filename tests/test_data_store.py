@@ -0,0 +1,109 @@
+"""Tests for the Excel-backed inventory store."""
+
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+from openpyxl import Workbook, load_workbook
+
+from app.data_store import ExcelDataStore
+
+HEADERS = ["Medicine_Name", "MG", "Rack_Number", "Stock", "Price", "Actual_Price"]
+
+
+def _write_workbook(path: Path, rows) -> None:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Medicines"
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def _stock_by_name(path: Path) -> dict:
+    workbook = load_workbook(path)
+    try:
+        sheet = workbook["Medicines"]
+        return {row[0]: row[3] for row in sheet.iter_rows(min_row=2, values_only=True)}
+    finally:
+        workbook.close()
+
+
+class SaveAfterExternalEditTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "medicines.xlsx"
+        _write_workbook(
+            self.path,
+            [
+                ["Aspirin", "100mg", "A1", 10, 2.5, None],
+                ["Ibuprofen", "200mg", "A2", 20, 4.0, None],
+            ],
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_save_in_sync_writes_stock_rows(self) -> None:
+        store = ExcelDataStore(self.path, "Medicines")
+        store.batch_reduce_stock({"Aspirin": 1})
+        store.save()
+
+        self.assertEqual(_stock_by_name(self.path), {"Aspirin": 9, "Ibuprofen": 20})
+        self.assertEqual(ExcelDataStore(self.path, "Medicines").get_medicine("aspirin")["stock"], 9)
+
+    def test_save_finds_rows_moved_by_external_edit(self) -> None:
+        store = ExcelDataStore(self.path, "Medicines")
+
+        workbook = load_workbook(self.path)
+        sheet = workbook["Medicines"]
+        sheet.insert_rows(2)
+        for col, value in enumerate(["Zinc", "50mg", "B1", 99, 1.0, None], start=1):
+            sheet.cell(row=2, column=col).value = value
+        workbook.save(self.path)
+        workbook.close()
+
+        store.batch_reduce_stock({"Aspirin": 1})
+        store.save()
+
+        self.assertEqual(_stock_by_name(self.path), {"Zinc": 99, "Aspirin": 9, "Ibuprofen": 20})
+        reloaded = ExcelDataStore(self.path, "Medicines")
+        self.assertEqual(reloaded.get_medicine("Zinc")["stock"], 99)
+        self.assertEqual(reloaded.get_medicine("Aspirin")["stock"], 9)
+
+    def test_save_refuses_when_medicine_removed_externally(self) -> None:
+        store = ExcelDataStore(self.path, "Medicines")
+
+        workbook = load_workbook(self.path)
+        workbook["Medicines"].delete_rows(2)
+        workbook.save(self.path)
+        workbook.close()
+
+        store.batch_reduce_stock({"Aspirin": 1})
+        with self.assertRaises(ValueError):
+            store.save()
+        self.assertEqual(_stock_by_name(self.path), {"Ibuprofen": 20})
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "medicines.xlsx"
+        _write_workbook(self.path, [["Aspirin", "100mg", "A1", 10, 2.5, None]])
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_cache_with_other_layout_falls_back_to_parse(self) -> None:
+        store = ExcelDataStore(self.path, "Medicines")
+        with store._cache_path.open("wb") as fh:
+            pickle.dump((store._cache_key(), ({}, [])), fh)
+
+        reloaded = ExcelDataStore(self.path, "Medicines")
+        self.assertEqual(reloaded.get_medicine("Aspirin")["stock"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for the openpyxl-backed inventory repository."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from app.data.excel_repo import ExcelRepository
+from tests.test_data_store import _stock_by_name, _write_workbook
+
+
+class SaveStockUpdatesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "medicines.xlsx"
+        _write_workbook(
+            self.path,
+            [
+                ["Aspirin", "100mg", "A1", 10, 2.5, None],
+                ["Ibuprofen", "200mg", "A2", 20, 4.0, None],
+            ],
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_save_follows_rows_moved_by_external_edit(self) -> None:
+        repo = ExcelRepository(self.path, "Medicines")
+        repo.list_medicines()
+
+        workbook = load_workbook(self.path)
+        sheet = workbook["Medicines"]
+        sheet.insert_rows(2)
+        for col, value in enumerate(["Zinc", "50mg", "B1", 99, 1.0, None], start=1):
+            sheet.cell(row=2, column=col).value = value
+        workbook.save(self.path)
+        workbook.close()
+
+        repo.save_stock_updates({"Aspirin": 9})
+
+        self.assertEqual(_stock_by_name(self.path), {"Zinc": 99, "Aspirin": 9, "Ibuprofen": 20})
+
+
+if __name__ == "__main__":
+    unittest.main()